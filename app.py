@@ -3,66 +3,199 @@
 from shiny import App, ui, render, reactive
 from shinywidgets import output_widget, render_widget
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 import pathlib
+import functools
 
 # ----------------------
 # Sample Data
 # ----------------------
-funds = pd.DataFrame({
-    "Fund": ["Fund I", "Fund II", "Fund III"],
-    "Commitment": [100, 200, 300],
-    "Called": [90, 180, 250],
-    "Distributions": [60, 150, 200],
-    "NAV": [40, 60, 100],
-    "IRR": [12.5, 14.8, 17.3],
-    "MOIC": [1.1, 1.3, 1.5],
-    "DPI": [0.6, 0.75, 0.8],
-    "RVPI": [0.44, 0.33, 0.4],
-    "TVPI": [1.04, 1.08, 1.2]
-})
-
-companies = pd.DataFrame({
-    "Company": ["Alpha", "Beta", "Gamma", "Delta"],
-    "Fund": ["Fund I", "Fund II", "Fund II", "Fund III"],
-    "Investment Date": ["2018", "2019", "2020", "2021"],
-    "Exit Date": ["2022", None, None, None],
-    "Cost": [10, 15, 12, 20],
-    "Value": [25, 20, 13, 30],
-    "MOIC": [2.5, 1.33, 1.08, 1.5]
-})
-
-cashflows = pd.DataFrame({
-    "Date": pd.date_range("2018-01-01", periods=8, freq='QE'),
-    "Type": ["Investment", "Investment", "Follow-on", "Exit", "Dividend", "Investment", "Exit", "Dividend"],
-    "Amount": [-10, -15, -5, 30, 2, -20, 40, 5],
-    "Fund": ["Fund I", "Fund I", "Fund I", "Fund I", "Fund I", "Fund II", "Fund II", "Fund II"]
-})
-cashflows['Date'] = cashflows['Date'].dt.date
-cashflows['Date'] = cashflows['Date'].astype('string')
-
-
-pipeline_data = pd.DataFrame({
-    "Deal": ["Startup A", "Startup B", "Startup C", "Startup D", "Startup E", "Startup F"],
-    "Stage": ["Screening", "Due Diligence", "IC", "Closed", "IC", "Closed"],
-    "Lead Partner": ["Aditya", "Siddharth", "Adrian", "Aditya", "Adrian", "Aditya"],
-})
-
-company_kpis = pd.DataFrame({
-    "Company": ["eFishery", "KitaBeli"],
-    "Monthly Revenue ($K)": [200, 150],
-    "User Growth (%)": [12, 18],
-    "EBITDA Margin (%)": [-10, -5],
-})
-
-lp_data = pd.DataFrame({
-    "LP Name": ["Sovereign Fund A", "Family Office B", "Institutional C"],
-    "Commitment ($M)": [50, 10, 30],
-    "Type": ["Sovereign", "Family Office", "Institution"],
-    "Email": ["lpA@example.com", "lpB@example.com", "lpC@example.com"],
-    "Phone": ["+62 812-3456", "+65 9123-4567", "+1 415-234-5678"],
-})
+_QUARTER_ENDS = ("03-31", "06-30", "09-30", "12-31")
+FUND_NAMES = ["Fund I", "Fund II", "Fund III"]
+
+
+@functools.cache
+def _funds():
+    return pd.DataFrame({
+        "Fund": pd.Categorical(FUND_NAMES, categories=FUND_NAMES),
+        "Commitment": np.asarray([100, 200, 300], dtype=np.int32),
+        "Called": np.asarray([90, 180, 250], dtype=np.int32),
+        "Distributions": np.asarray([60, 150, 200], dtype=np.int32),
+        "NAV": np.asarray([40, 60, 100], dtype=np.int32),
+        "IRR": np.asarray([12.5, 14.8, 17.3], dtype=np.float64),
+        "MOIC": np.asarray([1.1, 1.3, 1.5], dtype=np.float64),
+        "DPI": np.asarray([0.6, 0.75, 0.8], dtype=np.float64),
+        "RVPI": np.asarray([0.44, 0.33, 0.4], dtype=np.float64),
+        "TVPI": np.asarray([1.04, 1.08, 1.2], dtype=np.float64),
+    }, copy=False)
+
+
+@functools.cache
+def _companies():
+    df = pd.DataFrame({
+        "Company": ["Alpha", "Beta", "Gamma", "Delta"],
+        "Fund": pd.Categorical(["Fund I", "Fund II", "Fund II", "Fund III"], categories=FUND_NAMES),
+        "Investment Date": ["2018", "2019", "2020", "2021"],
+        "Exit Date": ["2022", None, None, None],
+        "Cost": np.asarray([10, 15, 12, 20], dtype=np.int32),
+        "Value": np.asarray([25, 20, 13, 30], dtype=np.int32),
+        "MOIC": np.asarray([2.5, 1.33, 1.08, 1.5], dtype=np.float64),
+    }, copy=False)
+    # Integer helper columns, parsed once and hidden from the company table
+    df["_inv_year"] = df["Investment Date"].astype(np.int16)
+    df["_exit_year"] = df["Exit Date"].fillna("2025").astype(np.int16)
+    df["_holding"] = df["_exit_year"] - df["_inv_year"]
+    return df
+
+
+@functools.cache
+def _cashflows():
+    # Quarter-end dates for 2018-2019
+    dates = [f"{year}-{month_day}" for year in (2018, 2019) for month_day in _QUARTER_ENDS]
+    return pd.DataFrame({
+        "Date": np.asarray(dates, dtype="datetime64[ns]"),
+        "Type": pd.Categorical(["Investment", "Investment", "Follow-on", "Exit", "Dividend", "Investment", "Exit", "Dividend"]),
+        "Amount": np.asarray([-10, -15, -5, 30, 2, -20, 40, 5], dtype=np.int32),
+        "Fund": pd.Categorical(["Fund I", "Fund I", "Fund I", "Fund I", "Fund I", "Fund II", "Fund II", "Fund II"], categories=FUND_NAMES),
+    }, copy=False)
+
+
+@functools.cache
+def _pipeline_data():
+    return pd.DataFrame({
+        "Deal": ["Startup A", "Startup B", "Startup C", "Startup D", "Startup E", "Startup F"],
+        "Stage": pd.Categorical(["Screening", "Due Diligence", "IC", "Closed", "IC", "Closed"]),
+        "Lead Partner": pd.Categorical(["Aditya", "Siddharth", "Adrian", "Aditya", "Adrian", "Aditya"]),
+    }, copy=False)
+
+
+@functools.cache
+def _company_kpis():
+    return pd.DataFrame({
+        "Company": ["eFishery", "KitaBeli"],
+        "Monthly Revenue ($K)": np.asarray([200, 150], dtype=np.int32),
+        "User Growth (%)": np.asarray([12, 18], dtype=np.int32),
+        "EBITDA Margin (%)": np.asarray([-10, -5], dtype=np.int32),
+    }, copy=False)
+
+
+@functools.cache
+def _lp_data():
+    return pd.DataFrame({
+        "LP Name": ["Sovereign Fund A", "Family Office B", "Institutional C"],
+        "Commitment ($M)": np.asarray([50, 10, 30], dtype=np.int32),
+        "Type": pd.Categorical(["Sovereign", "Family Office", "Institution"]),
+        "Email": ["lpA@example.com", "lpB@example.com", "lpC@example.com"],
+        "Phone": ["+62 812-3456", "+65 9123-4567", "+1 415-234-5678"],
+    }, copy=False)
+
+
+funds = _funds()
+companies = _companies()
+cashflows = _cashflows()
+pipeline_data = _pipeline_data()
+company_kpis = _company_kpis()
+lp_data = _lp_data()
+
+# Cash flow views don't depend on any input, so aggregate them once here
+# rather than on every render
+cashflow_by_type = cashflows.groupby("Type", as_index=False, observed=True)["Amount"].sum()
+cumulative_cashflows = cashflows.sort_values("Date", kind="stable")
+cumulative_cashflows["Cumulative"] = cumulative_cashflows.groupby("Fund", observed=True)["Amount"].cumsum()
+
+# The downloadable workbook is static, so keep it in memory
+_POC_BYTES = (pathlib.Path(__file__).parent / "data" / "POC_output.xlsx").read_bytes()
+
+COMPANY_COLUMNS = ["Company", "Fund", "Investment Date", "Exit Date", "Cost", "Value", "MOIC"]
+
+
+# Fund filters compare integer category codes rather than hashing strings
+_FUND_CODE_BY_NAME = {name: code for code, name in enumerate(funds["Fund"].cat.categories)}
+_FUNDS_FUND_CODES = funds["Fund"].cat.codes.to_numpy()
+_COMPANIES_FUND_CODES = companies["Fund"].cat.codes.to_numpy()
+
+
+def _fund_mask(codes, selected):
+    # Unknown names match nothing, as isin did
+    wanted = np.fromiter((_FUND_CODE_BY_NAME[s] for s in selected if s in _FUND_CODE_BY_NAME), dtype=codes.dtype)
+    return np.isin(codes, wanted)
+
+
+def _select_funds(selected):
+    return funds[_fund_mask(_FUNDS_FUND_CODES, selected)] if selected else funds
+
+
+@functools.lru_cache(maxsize=64)
+def _select_companies(selected, year):
+    # Combine both predicates so the frame is only indexed once
+    mask = companies["_inv_year"].to_numpy() <= year
+    if selected:
+        mask &= _fund_mask(_COMPANIES_FUND_CODES, selected)
+    return companies[mask]
+
+
+# ----------------------
+# Figures
+# ----------------------
+MAX_LINE_POINTS = 1000
+
+
+def _downsample(df, y, by, max_points=MAX_LINE_POINTS):
+    # Min/max decimation per group so long histories ship ~max_points rows
+    # per line to the browser while keeping peaks and troughs
+    if len(df) <= max_points:
+        return df
+    parts = []
+    for _, group in df.groupby(by, sort=False, observed=True):
+        # Missing values aren't drawn anyway and would break idxmin/idxmax
+        group = group.dropna(subset=[y])
+        if len(group) <= max_points:
+            parts.append(group)
+            continue
+        buckets = np.arange(len(group)) * (max_points // 2) // len(group)
+        values = pd.Series(group[y].to_numpy()).groupby(buckets)
+        keep = np.union1d(values.idxmin().to_numpy(), values.idxmax().to_numpy())
+        parts.append(group.iloc[keep])
+    return pd.concat(parts)
+
+
+# Allocation charts are built from fixed values, so build them once
+_SECTOR_FIG = px.pie(names=["Tech", "Healthcare", "Energy"], values=[40, 30, 30], title="Sector Allocation", hole=0.3)
+_REGION_FIG = px.pie(names=["North America", "Europe", "Asia"], values=[50, 30, 20], title="Regional Allocation", hole=0.3)
+
+
+# Cash flow charts don't depend on any input either
+_CASHFLOW_TIMELINE_FIG = px.line(_downsample(cashflows, "Amount", "Fund"), x="Date", y="Amount", color="Fund", title="Cash Flow Timeline", markers=True, render_mode="webgl")
+_CASHFLOW_TIMELINE_FIG.add_hline(
+    y=0,
+    line_dash="dash",
+    line_color="#346beb",
+)
+_CASHFLOW_TIMELINE_FIG.update_xaxes(tickformat="%Y-%m")
+_CASHFLOW_BREAKDOWN_FIG = px.bar(cashflow_by_type, x="Type", y="Amount", title="Cash Flow Breakdown by Type")
+_CUMULATIVE_CASHFLOW_FIG = px.line(_downsample(cumulative_cashflows, "Cumulative", "Fund"), x="Date", y="Cumulative", color="Fund", title="Cumulative Cash Flow by Fund", render_mode="webgl")
+_CUMULATIVE_CASHFLOW_FIG.add_hline(
+    y=0,
+    line_dash="dash",
+    line_color="#346beb",
+)
+_CUMULATIVE_CASHFLOW_FIG.update_xaxes(tickformat="%Y-%m")
+
+
+@functools.lru_cache(maxsize=16)
+def _irr_figure(selected):
+    fig = px.bar(_select_funds(selected), x="Fund", y="IRR", text="IRR", title="IRR Comparison")
+    fig.add_hline(
+        y=15,  # 15%
+        line_dash="dash",
+        line_color="#346beb",
+        annotation_text="Benchmark 15%",
+        annotation_position="top left"
+    )
+    return fig
+
 
 # ----------------------
 # UI
@@ -163,20 +296,19 @@ app_ui = ui.page_sidebar(
 # ----------------------
 def server(input, output, session):
 
+    # Only year-dependent outputs go through filtered_companies; everything
+    # fund-only hangs off selected_funds so the year slider never touches it
+    @reactive.calc
+    def selected_funds():
+        return tuple(sorted(input.fund_filter() or ()))
+
     @reactive.calc
     def filtered_funds():
-        selected = input.fund_filter()
-        return funds[funds["Fund"].isin(selected)] if selected else funds
+        return _select_funds(selected_funds())
 
     @reactive.calc
     def filtered_companies():
-        selected = input.fund_filter()
-        year = input.year_filter()
-        df = companies.copy()
-        df = df[df["Investment Date"].astype(int) <= year]
-        if selected:
-            df = df[df["Fund"].isin(selected)]
-        return df
+        return _select_companies(selected_funds(), int(input.year_filter()))
 
     @output
     @render.data_frame
@@ -194,57 +326,49 @@ def server(input, output, session):
     @output
     @render_widget
     def sector_alloc():
-        return px.pie(names=["Tech", "Healthcare", "Energy"], values=[40, 30, 30], title="Sector Allocation", hole=0.3)
+        return _SECTOR_FIG
 
     @output
     @render_widget
     def regional_alloc():
-        return px.pie(names=["North America", "Europe", "Asia"], values=[50, 30, 20], title="Regional Allocation", hole=0.3)
+        return _REGION_FIG
 
 
     @output
     @render.download(filename='company_profile.xlsx')
     def download_data():
-        file_path = pathlib.Path('data/POC_output.xlsx')
-        with open(file_path, 'rb') as f:
-            yield f.read()
+        yield _POC_BYTES
 
 
     @output
     @render.data_frame
     def fund_metrics():
-        return filtered_funds()
+        return render.DataGrid(filtered_funds(), height="400px")
 
     @output
     @render_widget
     def irr_comparison():
-        df = filtered_funds()
-        fig = px.bar(df, x="Fund", y="IRR", text="IRR", title="IRR Comparison")
-        fig.add_hline(
-                    y=15,  # 15%
-                    line_dash="dash",
-                    line_color="#346beb",
-                    annotation_text="Benchmark 15%",
-                    annotation_position="top left"
-                )
-        return fig
+        return _irr_figure(selected_funds())
 
     @output
     @render_widget
     def deployment_timeline():
         df = filtered_companies()
-        fig = go.Figure()
-        for _, row in df.iterrows():
-            fig.add_trace(go.Scatter(x=[row["Investment Date"], row["Exit Date"] or "2025"],
-                                     y=[row["Company"]]*2,
-                                     mode="lines+markers", name=row["Company"]))
+        # One trace for all companies: each segment is (invest, exit, gap)
+        n = len(df)
+        x = np.empty(3 * n, dtype=object)
+        x[0::3] = df["_inv_year"].to_numpy()
+        x[1::3] = df["_exit_year"].to_numpy()
+        y = np.empty(3 * n, dtype=object)
+        y[0::3] = y[1::3] = df["Company"].to_numpy()
+        fig = go.Figure(go.Scattergl(x=x, y=y, mode="lines+markers", connectgaps=False, showlegend=False))
         fig.update_layout(title="Deployment Timeline", xaxis_title="Year", yaxis_title="Company")
         return fig
 
     @output
     @render.data_frame
     def company_table():
-        return filtered_companies()
+        return render.DataGrid(filtered_companies()[COMPANY_COLUMNS], height="400px")
 
     @output
     @render_widget
@@ -264,8 +388,7 @@ def server(input, output, session):
     @render_widget
     def holding_period():
         df = filtered_companies()
-        df["Holding"] = df["Exit Date"].fillna("2025").astype(int) - df["Investment Date"].astype(int)
-        fig = px.bar(df, x="Company", y="Holding", title="Holding Period (Years)")
+        fig = px.bar(df, x="Company", y="_holding", labels={"_holding": "Holding"}, title="Holding Period (Years)")
         fig.add_hline(
                     y=4.5,  # 4.5 years
                     line_dash="dash",
@@ -278,32 +401,17 @@ def server(input, output, session):
     @output
     @render_widget
     def cashflow_timeline():
-        fig = px.line(cashflows, x="Date", y="Amount", color="Fund", title="Cash Flow Timeline", markers=True)
-        fig.add_hline(
-                    y=0,  
-                    line_dash="dash",
-                    line_color="#346beb",
-                )
-        return fig
+        return _CASHFLOW_TIMELINE_FIG
 
     @output
     @render_widget
     def cashflow_breakdown():
-        df = cashflows.groupby("Type")["Amount"].sum().reset_index()
-        return px.bar(df, x="Type", y="Amount", title="Cash Flow Breakdown by Type")
+        return _CASHFLOW_BREAKDOWN_FIG
 
     @output
     @render_widget
     def cumulative_cashflow():
-        df = cashflows.sort_values("Date")
-        df["Cumulative"] = df.groupby("Fund")["Amount"].cumsum()
-        fig = px.line(df, x="Date", y="Cumulative", color="Fund", title="Cumulative Cash Flow by Fund")
-        fig.add_hline(
-                    y=0,  
-                    line_dash="dash",
-                    line_color="#346beb",
-                )
-        return fig
+        return _CUMULATIVE_CASHFLOW_FIG
 
 # ----------------------
 # Run App